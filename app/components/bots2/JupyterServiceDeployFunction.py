@@ -1,4 +1,5 @@
 @app.route('/apa/user/<username>/<bot_id>', methods=['POST'])
+@traced()
 def deploy_bot(username, bot_id):
     logger.info(f"Received deployment request for username: {username} and bot_id: {bot_id}")
 
@@ -198,7 +199,8 @@ def deploy_bot(username, bot_id):
         logger.info("User values YAML written: %s", values_path)
 
         # 3. Create Namespace if missing
-        subprocess.run(["kubectl", "create", "namespace", namespace], capture_output=True)
+        with trace_span("kubectl.create_namespace", namespace=namespace):
+            subprocess.run(["kubectl", "create", "namespace", namespace], capture_output=True)
 
         # 4. Deploy with Helm template
         helm_cmd = [
@@ -217,14 +219,18 @@ def deploy_bot(username, bot_id):
         ]
 
         logger.info("Executing Helm template...")
-        rendered = subprocess.run(helm_cmd, capture_output=True, text=True)
+        with trace_span("helm.template", namespace=namespace) as span:
+            rendered = subprocess.run(helm_cmd, capture_output=True, text=True)
+            span.set_attribute("returncode", rendered.returncode)
 
         if rendered.returncode != 0:
             logger.error("Helm template failed: %s", rendered.stderr)
             return jsonify({"error": "Helm template failed", "details": rendered.stderr}), 500
 
-        kubectl_apply = subprocess.run(["kubectl", "apply", "-n", namespace, "-f", "-"],
-                                       input=rendered.stdout, text=True, capture_output=True)
+        with trace_span("kubectl.apply", namespace=namespace) as span:
+            kubectl_apply = subprocess.run(["kubectl", "apply", "-n", namespace, "-f", "-"],
+                                           input=rendered.stdout, text=True, capture_output=True)
+            span.set_attribute("returncode", kubectl_apply.returncode)
         if kubectl_apply.returncode != 0:
             logger.error("kubectl apply failed: %s", kubectl_apply.stderr)
             return jsonify({"error": "Kubernetes apply failed", "details": kubectl_apply.stderr}), 500
@@ -255,7 +261,8 @@ def deploy_bot(username, bot_id):
         with open(ingress_path, "w") as f:
             f.write(ingress_yaml)
 
-        subprocess.run(["kubectl", "apply", "-f", ingress_path], capture_output=True)
+        with trace_span("kubectl.apply_ingress", namespace=namespace):
+            subprocess.run(["kubectl", "apply", "-f", ingress_path], capture_output=True)
         logger.info("Ingress applied for namespace: %s", namespace)
 
         # Success response
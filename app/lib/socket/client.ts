@@ -4,6 +4,16 @@ import { API_CONFIG } from '~/lib/config';
 
 let socket: any = null;
 
+// The service coalesces room events per tick; clients that join with `batch: true` receive them as
+// one `event_batch` frame ({ events: [[event, data], ...] }). Replay each one to the regular listeners.
+function dispatchEventBatch(payload: { events?: Array<[string, unknown]> }) {
+  for (const [event, data] of payload?.events ?? []) {
+    for (const listener of socket.listeners(event)) {
+      listener(data);
+    }
+  }
+}
+
 export function initializeSocket(username: string) {
 
   // console.log('[Socket] Initializing new socket connection for user:', username);
@@ -20,9 +30,11 @@ export function initializeSocket(username: string) {
 
   socket.on('connect', () => {
     // console.log('[Socket] Connected successfully, joining room:', username);
-    socket.emit('join', { username });
+    socket.emit('join', { username, batch: true });
   });
 
+  socket.on('event_batch', dispatchEventBatch);
+
   socket.on('disconnect', () => {
     // console.log('[Socket] Disconnected');
   });
@@ -37,7 +49,7 @@ export function initializeSocket(username: string) {
 
   socket.on('reconnect', () => {
     // console.log('[Socket] Reconnected, rejoining room:', username);
-    socket.emit('join', { username });
+    socket.emit('join', { username, batch: true });
   });
 
   return socket;
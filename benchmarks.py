@@ -0,0 +1,145 @@
+"""
+Microbenchmarks for the notebook service's code-preparation helpers.
+
+    python benchmarks.py tokens [--model gpt-4o] [--limit 5000]
+    python benchmarks.py normalize [--black]
+
+`tokens` compares a full tiktoken encode with TokenCounter.check_budget (cold, then memoized)
+over generated Python sources from 1 KB to 5 MB.
+
+`normalize` compares CodeNormalizer with the cleanup functions it replaced (kept below as
+legacy_*) over the same sources; --black includes the black step on both sides.
+"""
+import argparse
+import re
+import time
+
+from black import FileMode, format_str
+
+from jupyterhub_service1 import CodeNormalizer, TokenCounter
+
+SIZES = (1024, 16 * 1024, 128 * 1024, 1024 * 1024, 5 * 1024 * 1024)
+SAMPLE_LINES = (
+    "import pandas as pd\n",
+    "def compute_signal(frame, window=20):\n",
+    "    return frame['close'].rolling(window).mean() - frame['close']\n",
+    "# entry: “buy” when the spread crosses zero — otherwise wait…\n",
+    "orders = [{'side': 'buy', 'qty': 0.5}, {'side': 'sell', 'qty': 1.25}]\n",
+)
+
+
+def sample_source(size):
+    lines = []
+    total = 0
+    while total < size:
+        line = SAMPLE_LINES[len(lines) % len(SAMPLE_LINES)]
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)[:size]
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_tokens(args):
+    counter = TokenCounter()
+    encoding = counter.encoder(args.model)  # Load outside the timings
+    print(f"{'size':>10} {'tokens':>9} {'encode ms':>10} {'budget ms':>10} {'memo ms':>9}  decided by")
+    for size in SIZES:
+        content = sample_source(size)
+        repeat = 5 if size <= 128 * 1024 else 2
+        tokens = len(encoding.encode(content, disallowed_special=()))
+        encode = best_of(lambda: encoding.encode(content, disallowed_special=()), repeat)
+        cold = best_of(lambda: _fresh(counter).check_budget(content, args.model, args.limit), repeat)
+        counter.check_budget(content, args.model, args.limit)
+        memo = best_of(lambda: counter.check_budget(content, args.model, args.limit), repeat)
+        fits, bound, exact = counter.check_budget(content, args.model, args.limit)
+        decided = "exact count" if exact else ("byte bound" if fits else "estimate") + f" {bound}"
+        print(f"{size:>10} {tokens:>9} {encode * 1000:>10.2f} {cold * 1000:>10.2f} {memo * 1000:>9.3f}  {decided}")
+
+
+def _fresh(counter):
+    """A counter sharing `counter`'s loaded encoders but with an empty count cache."""
+    fresh = TokenCounter()
+    fresh._encoders = counter._encoders
+    return fresh
+
+
+def legacy_clean_content(content):
+    replacements = {
+        '“': '"', '”': '"',  # Double quotes
+        '‘': "'", '’': "'",  # Single quotes
+        '–': '-', '—': '-',  # Dashes
+    }
+    for old, new in replacements.items():
+        content = content.replace(old, new)
+    return content
+
+
+def legacy_strip_markdown(code):
+    code = re.sub(r"^```(python)?", "", code.strip(), flags=re.MULTILINE)
+    code = re.sub(r"```$", "", code.strip(), flags=re.MULTILINE)
+    code = code.replace("‘", "'").replace("’", "'")
+    code = code.replace("“", "\"").replace("”", "\"")
+    code = "".join(char for char in code if char.isprintable())
+    return code.strip()
+
+
+def legacy_clean_generated_code(code, black):
+    replacements = {
+        '“': '"', '”': '"',  # Double quotes
+        '‘': "'", '’': "'",  # Single quotes
+        '–': '-', '—': '-',  # Dashes
+        '…': '...',           # Ellipsis
+    }
+    for old, new in replacements.items():
+        code = code.replace(old, new)
+    return format_str(code, mode=FileMode()) if black else code
+
+
+def bench_normalize(args):
+    steps = ("translate", "control", "fences", "strip") + (("black",) if args.black else ())
+    normalize = CodeNormalizer(steps)
+
+    def legacy(code):
+        if args.black:
+            # The markdown-stripping variant was shadowed (and joins every line, which black rejects)
+            return legacy_clean_generated_code(legacy_clean_content(code), True)
+        return legacy_clean_generated_code(legacy_strip_markdown(legacy_clean_content(code)), False)
+
+    sizes = SIZES if not args.black else SIZES[:3]  # black takes seconds per megabyte on either side
+    print(f"{'size':>10} {'legacy ms':>10} {'new ms':>9} {'speedup':>8}")
+    for size in sizes:
+        content = sample_source(size)
+        if args.black:
+            content = content[:content.rfind("\n") + 1]  # Whole lines only, so black can parse it
+        else:
+            content = "```python\n" + content + "\n```\n"
+        repeat = 5 if size <= 128 * 1024 else 2
+        before = best_of(lambda: legacy(content), repeat)
+        after = best_of(lambda: normalize(content), repeat)
+        print(f"{size:>10} {before * 1000:>10.2f} {after * 1000:>9.2f} {before / after:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    tokens = commands.add_parser("tokens", help="token counting cost versus content size")
+    tokens.add_argument("--model", default="gpt-4o")
+    tokens.add_argument("--limit", type=int, default=5000, help="token budget to check against")
+    tokens.set_defaults(func=bench_tokens)
+    normalize = commands.add_parser("normalize", help="code normalization cost versus the legacy functions")
+    normalize.add_argument("--black", action="store_true", help="include the black formatting step")
+    normalize.set_defaults(func=bench_normalize)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
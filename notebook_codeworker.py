@@ -0,0 +1,88 @@
+"""
+Code worker for jupyterhub_service1.py.
+
+Parsing and black formatting are CPU-bound; the service runs them here, in a pool of these
+processes, so they never block its event loop. black is imported once at startup. Jobs arrive as
+JSON lines on stdin and are answered, one at a time and in order, as JSON lines on stdout:
+
+    {"id": ..., "op": "validate", "code": ...}
+        -> {"id": ..., "ok": true} or {"id": ..., "ok": false, "error": {...}}
+    {"id": ..., "op": "format", "code": ..., "line_length": 88}
+        -> {"id": ..., "ok": true, "code": ...} or {"id": ..., "ok": false, "error": {...}}
+
+An error is {"kind": "syntax", "message", "line", "column", "end_line", "end_column", "text"}
+for code that does not parse, and {"kind": "format", "message"} when black rejects code that
+does. The first line written is {"event": "ready", "pid": ..., "black": true|false}.
+"""
+import ast
+import json
+import os
+import sys
+
+try:
+    import black
+except ImportError:  # validate still works; format jobs report the missing package
+    black = None
+
+
+def syntax_error(e):
+    return {
+        "kind": "syntax",
+        "message": e.msg,
+        "line": e.lineno,
+        "column": e.offset,
+        "end_line": getattr(e, "end_lineno", None),
+        "end_column": getattr(e, "end_offset", None),
+        "text": (e.text or "").rstrip("\n") or None,
+    }
+
+
+def parse(code):
+    """None if `code` parses, else the structured error."""
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        return syntax_error(e)
+    except ValueError as e:  # e.g. null bytes
+        return {"kind": "syntax", "message": str(e), "line": None, "column": None,
+                "end_line": None, "end_column": None, "text": None}
+    return None
+
+
+def handle(job):
+    code = job.get("code")
+    if not isinstance(code, str):
+        return {"ok": False, "error": {"kind": "request", "message": "code must be a string"}}
+    error = parse(code)
+    if error is not None:
+        return {"ok": False, "error": error}
+    if job.get("op") == "validate":
+        return {"ok": True}
+    if job.get("op") != "format":
+        return {"ok": False, "error": {"kind": "request", "message": f"unknown operation: {job.get('op')!r}"}}
+    if black is None:
+        return {"ok": False, "error": {"kind": "format", "message": "black is not installed"}}
+    try:
+        mode = black.FileMode(line_length=int(job.get("line_length") or black.DEFAULT_LINE_LENGTH))
+        return {"ok": True, "code": black.format_str(code, mode=mode)}
+    except Exception as e:
+        return {"ok": False, "error": {"kind": "format", "message": str(e)}}
+
+
+def main():
+    out = sys.stdout
+    out.write(json.dumps({"event": "ready", "pid": os.getpid(), "black": black is not None}) + "\n")
+    out.flush()
+    for line in sys.stdin:
+        try:
+            job = json.loads(line)
+            response = handle(job)
+        except Exception as e:  # Never let one bad job take the worker down
+            job = {}
+            response = {"ok": False, "error": {"kind": "request", "message": str(e)}}
+        out.write(json.dumps({"id": job.get("id"), **response}) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Warm interpreter for notebook runs.
+
+Started by jupyterhub_service1.py (through sudo, as the run-as user) with the heavy modules
+preloaded. For every connection on its abstract Unix socket it reads one JSON request line,
+forks, and the child runs the notebook script with stdout/stderr connected to that socket.
+Lifecycle events are written as JSON lines to the control pipe (this process's stdout):
+
+    {"event": "ready", "pid": ..., "preloaded": [...], "failed": [...]}
+    {"event": "started", "run": ..., "pid": ...}
+    {"event": "exit", "run": ..., "pid": ..., "returncode": ...}
+
+Abstract socket names carry no permissions, so both ends check SO_PEERCRED: this process only
+serves the allowed uid, and the service only talks to the pid from the ready event.
+
+A line "shutdown" on stdin stops accepting new runs; the process exits once its children have
+been reaped. EOF on stdin (the service went away) does the same.
+"""
+import argparse
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import socket
+import struct
+import sys
+import traceback
+
+REQUEST_TIMEOUT = 5  # Seconds a client has to send its request line
+_PEERCRED = struct.Struct("3i")  # pid, uid, gid
+
+
+def send_event(control_fd, **event):
+    os.write(control_fd, (json.dumps(event) + "\n").encode())
+
+
+def preload(modules):
+    loaded, failed = [], []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:  # A missing optional package must not keep the worker from starting
+            print(f"forkserver: could not preload {name}: {e}", file=sys.stderr)
+            failed.append(name)
+    return loaded, failed
+
+
+def read_request(conn):
+    conn.settimeout(REQUEST_TIMEOUT)
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(4096)
+        if not chunk:
+            raise ValueError("connection closed before request was complete")
+        data += chunk
+        if len(data) > 65536:
+            raise ValueError("request too large")
+    conn.settimeout(None)
+    return json.loads(data)
+
+
+def run_child(conn, request, control_fd, listener, wakeup_fds):
+    """Runs in the forked child: become the notebook process. Never returns."""
+    code = 1
+    try:
+        os.setsid()  # Own session/process group so the service can signal the whole run
+        listener.close()
+        os.close(control_fd)
+        signal.set_wakeup_fd(-1)
+        for fd in wakeup_fds:
+            os.close(fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        conn.close()
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        script = request["script"]
+        sys.argv = [script] + list(request.get("args", []))
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        runpy.run_path(script, run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def reap(children, control_fd):
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            break
+        run_id = children.pop(pid, None)
+        returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        send_event(control_fd, event="exit", run=run_id, pid=pid, returncode=returncode)
+
+
+def serve(listener, allowed_uid, control_fd):
+    children = {}  # pid -> run id
+    accepting = True
+
+    # SIGCHLD wakes the select loop through a self-pipe so exits are reported immediately
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    while accepting or children:
+        watched = [sys.stdin, wakeup_r] + ([listener] if accepting else [])
+        readable, _, _ = select.select(watched, [], [], 1.0)
+
+        if wakeup_r in readable:
+            try:
+                while os.read(wakeup_r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+        if sys.stdin in readable:
+            line = sys.stdin.readline()
+            if not line or line.strip() == "shutdown":
+                accepting = False
+                listener.close()
+
+        if accepting and listener in readable:
+            conn, _ = listener.accept()
+            try:
+                _, uid, _ = _PEERCRED.unpack(
+                    conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+                )
+                if uid not in (allowed_uid, 0):
+                    raise PermissionError(f"uid {uid} is not allowed")
+                request = read_request(conn)
+            except (OSError, ValueError) as e:
+                print(f"forkserver: rejected connection: {e}", file=sys.stderr)
+                conn.close()
+                continue
+
+            pid = os.fork()
+            if pid == 0:
+                run_child(conn, request, control_fd, listener, (wakeup_r, wakeup_w))
+            conn.close()
+            children[pid] = request.get("run")
+            send_event(control_fd, event="started", run=request.get("run"), pid=pid)
+
+        reap(children, control_fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", required=True, help="Abstract Unix socket name to listen on")
+    parser.add_argument("--allowed-uid", type=int, required=True, help="uid allowed to request runs")
+    parser.add_argument("--preload", default="", help="Comma separated modules to import up front")
+    args = parser.parse_args()
+
+    # Keep the control pipe private; anything printed by preloaded modules goes to stderr
+    control_fd = os.dup(1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    # Bind before reporting ready, so a run requested right after "ready" finds the socket (and
+    # an impostor already holding the name makes startup fail instead)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind("\0" + args.socket)
+    listener.listen(64)
+
+    loaded, failed = preload([name for name in args.preload.split(",") if name])
+    send_event(control_fd, event="ready", pid=os.getpid(), preloaded=loaded, failed=failed)
+    serve(listener, args.allowed_uid, control_fd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Privileged helper for jupyterhub_service1.py.
+
+Runs as root and replaces the service's sudo subprocesses with a few allow-listed operations on
+a Unix socket. Only the service account may connect (checked with SO_PEERCRED). Each connection
+carries one JSON request line and receives one JSON response line:
+
+    {"op": "provision_user", "username": ...}
+        -> {"ok": true, "uid": ..., "notebook_dir": ...}
+    {"op": "write_file", "username": ..., "name": ..., "content": ..., "fsync": false}
+        -> {"ok": true, "path": ...}
+    {"op": "list_notebooks", "username": ...}
+        -> {"ok": true, "notebooks": [{"name": ..., "size": ..., "mtime": ...}, ...]}
+    {"op": "spawn", "username": ..., "name": ...}
+        -> {"ok": true, "pid": ...} with the read end of the run's stdout/stderr pipe attached
+           (SCM_RIGHTS); the connection stays open and later receives
+           {"event": "exit", "pid": ..., "returncode": ...}
+    {"op": "signal", "pid": ..., "signal": ..., "group": false}
+        -> {"ok": true}
+
+Failures come back as {"ok": false, "error": ...}. Paths are never taken from the client: files
+live in <home-base>/<username>/notebooks, are opened relative to that directory without following
+symlinks, and accounts below --min-uid are refused. Notebooks run as --run-as (by default "owner",
+the notebook's owner; never root). The script is opened once without following symlinks and the
+interpreter runs that open file, so it cannot be swapped between the checks and the exec.
+`signal` only reaches runs this helper started.
+"""
+import argparse
+import json
+import os
+import pwd
+import re
+import signal
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import threading
+
+MAX_REQUEST_BYTES = 64 * 1024 * 1024  # Notebook content travels inside the request line
+REQUEST_TIMEOUT = 30
+_PEERCRED = struct.Struct("3i")  # pid, uid, gid
+USERNAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_-]{0,31}$")
+NOTEBOOK_DIR_NAME = "notebooks"
+
+
+class RequestError(Exception):
+    """Reported back to the client as {"ok": false, "error": ...}."""
+
+
+def check_username(request):
+    username = request.get("username")
+    if not isinstance(username, str) or not USERNAME_RE.match(username):
+        raise RequestError(f"invalid username: {username!r}")
+    return username
+
+
+def check_name(request):
+    name = request.get("name")
+    if (not isinstance(name, str) or not name or len(name) > 255 or "/" in name or "\0" in name
+            or name.startswith(".")):
+        raise RequestError(f"invalid notebook name: {name!r}")
+    return name
+
+
+def send_json(conn, message, fds=()):
+    data = (json.dumps(message) + "\n").encode()
+    if fds:
+        socket.send_fds(conn, [data], list(fds))
+    else:
+        conn.sendall(data)
+
+
+class Helper:
+    def __init__(self, home_base, python, run_as, min_uid):
+        self.home_base = home_base
+        self.python = python
+        self.run_as = run_as
+        self.min_uid = min_uid
+        self.runs = {}  # pid -> Popen of runs started by this helper
+        self.lock = threading.Lock()
+        self.ops = {
+            "provision_user": self.provision_user,
+            "write_file": self.write_file,
+            "list_notebooks": self.list_notebooks,
+            "spawn": self.spawn,
+            "signal": self.signal,
+        }
+
+    def account(self, username):
+        try:
+            account = pwd.getpwnam(username)
+        except KeyError:
+            raise RequestError(f"no such user: {username}")
+        if account.pw_uid < self.min_uid:
+            raise RequestError(f"refusing system account {username}")
+        return account
+
+    def open_notebook_dir(self, account):
+        """fd of the user's notebook directory, opened without following symlinks and owned by them."""
+        home_fd = os.open(os.path.join(self.home_base, account.pw_name), os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW)
+        try:
+            dir_fd = os.open(NOTEBOOK_DIR_NAME, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=home_fd)
+        finally:
+            os.close(home_fd)
+        if os.fstat(dir_fd).st_uid != account.pw_uid:
+            os.close(dir_fd)
+            raise RequestError(f"notebook directory of {account.pw_name} is not owned by them")
+        return dir_fd
+
+    def provision_user(self, conn, request):
+        username = check_username(request)
+        try:
+            pwd.getpwnam(username)
+        except KeyError:
+            subprocess.run(["useradd", "-m", username], check=True, capture_output=True)
+        account = self.account(username)
+
+        home = os.path.join(self.home_base, username)
+        notebook_dir = os.path.join(home, NOTEBOOK_DIR_NAME)
+        for path in (home, notebook_dir):
+            st = os.lstat(path) if os.path.lexists(path) else None
+            if st is None:
+                os.mkdir(path, 0o755)
+                os.chown(path, account.pw_uid, account.pw_gid)
+            elif not stat.S_ISDIR(st.st_mode):
+                raise RequestError(f"{path} exists and is not a directory")
+            elif st.st_uid != account.pw_uid:
+                os.chown(path, account.pw_uid, account.pw_gid)
+        return {"uid": account.pw_uid, "notebook_dir": notebook_dir}
+
+    def write_file(self, conn, request):
+        username, name = check_username(request), check_name(request)
+        content = request.get("content")
+        if not isinstance(content, str):
+            raise RequestError("content must be a string")
+        account = self.account(username)
+        dir_fd = self.open_notebook_dir(account)
+        tmp_name = f".{name}.{os.urandom(8).hex()}.tmp"  # Unpredictable, so a planted file cannot block writes
+        try:
+            fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o644, dir_fd=dir_fd)
+            try:
+                os.fchown(fd, account.pw_uid, account.pw_gid)
+                with os.fdopen(fd, "w", encoding="utf-8", closefd=False) as f:
+                    f.write(content)
+                if request.get("fsync"):
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.rename(tmp_name, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+        except BaseException:
+            try:
+                os.unlink(tmp_name, dir_fd=dir_fd)
+            except OSError:
+                pass
+            raise
+        finally:
+            os.close(dir_fd)
+        return {"path": os.path.join(self.home_base, username, NOTEBOOK_DIR_NAME, name)}
+
+    def list_notebooks(self, conn, request):
+        account = self.account(check_username(request))
+        dir_fd = self.open_notebook_dir(account)
+        try:
+            notebooks = []
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                    notebooks.append({"name": entry.name, "size": st.st_size, "mtime": st.st_mtime})
+        finally:
+            os.close(dir_fd)
+        return {"notebooks": notebooks}
+
+    def spawn(self, conn, request):
+        username, name = check_username(request), check_name(request)
+        owner = self.account(username)
+        run_as = owner if self.run_as == "owner" else pwd.getpwnam(self.run_as)
+        if run_as.pw_uid == 0:
+            raise RequestError("refusing to run notebooks as root")
+        dir_fd = self.open_notebook_dir(owner)
+        try:
+            script_fd = os.open(name, os.O_RDONLY | os.O_NOFOLLOW | os.O_CLOEXEC, dir_fd=dir_fd)
+        except OSError as e:
+            raise RequestError(f"cannot open {name}: {e.strerror}")
+        finally:
+            os.close(dir_fd)
+        try:
+            if not stat.S_ISREG(os.fstat(script_fd).st_mode):
+                raise RequestError(f"{name} is not a regular file")
+            return self._spawn_script(conn, username, run_as, script_fd)
+        finally:
+            os.close(script_fd)
+
+    def _spawn_script(self, conn, username, run_as, script_fd):
+        """Run the already opened and checked script; the child reads it through its inherited fd."""
+        notebook_dir = os.path.join(self.home_base, username, NOTEBOOK_DIR_NAME)
+        env = {
+            "HOME": run_as.pw_dir,
+            "USER": run_as.pw_name,
+            "LOGNAME": run_as.pw_name,
+            "PATH": os.environ.get("PATH", "/usr/local/bin:/usr/bin:/bin"),
+            "LANG": os.environ.get("LANG", "C.UTF-8"),
+            "PYTHONPATH": notebook_dir,  # sys.path[0] is /proc/self/fd, so keep sibling imports working
+        }
+        read_fd, write_fd = os.pipe()
+        try:
+            process = subprocess.Popen(
+                [self.python, f"/proc/self/fd/{script_fd}"],
+                pass_fds=(script_fd,),
+                stdin=subprocess.DEVNULL,
+                stdout=write_fd,
+                stderr=subprocess.STDOUT,
+                cwd=notebook_dir,
+                env=env,
+                user=run_as.pw_uid,
+                group=run_as.pw_gid,
+                extra_groups=os.getgrouplist(run_as.pw_name, run_as.pw_gid),
+                start_new_session=True,  # Own process group so the service can signal the whole run
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        with self.lock:
+            self.runs[process.pid] = process
+        try:
+            send_json(conn, {"ok": True, "pid": process.pid}, [read_fd])
+        finally:
+            os.close(read_fd)
+
+        returncode = process.wait()
+        with self.lock:
+            self.runs.pop(process.pid, None)
+        try:
+            send_json(conn, {"event": "exit", "pid": process.pid, "returncode": returncode})
+        except OSError:
+            pass  # The service went away; nothing left to report to
+        return None
+
+    def signal(self, conn, request):
+        pid, signum = request.get("pid"), request.get("signal")
+        if not isinstance(pid, int) or not isinstance(signum, int) or signum not in signal.valid_signals():
+            raise RequestError("pid and a valid signal number are required")
+        with self.lock:
+            if pid not in self.runs:
+                raise RequestError(f"pid {pid} was not started by this helper")
+        try:
+            if request.get("group"):
+                os.killpg(pid, signum)
+            else:
+                os.kill(pid, signum)
+        except ProcessLookupError:
+            raise RequestError(f"pid {pid} has exited")
+        return {}
+
+    def handle(self, conn, allowed_uid):
+        try:
+            _, uid, _ = _PEERCRED.unpack(conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size))
+            if uid not in (allowed_uid, 0):
+                print(f"privhelper: rejected connection from uid {uid}", file=sys.stderr)
+                return
+            conn.settimeout(REQUEST_TIMEOUT)
+            with conn.makefile("rb") as reader:
+                line = reader.readline(MAX_REQUEST_BYTES + 1)
+            if not line.endswith(b"\n"):
+                raise RequestError("request too large or incomplete")
+            conn.settimeout(None)
+            request = json.loads(line)
+            handler = self.ops.get(request.get("op")) if isinstance(request, dict) else None
+            if handler is None:
+                raise RequestError(f"unknown operation: {request.get('op') if isinstance(request, dict) else None!r}")
+            result = handler(conn, request)
+            if result is not None:
+                send_json(conn, {"ok": True, **result})
+        except (RequestError, ValueError, OSError, subprocess.CalledProcessError) as e:
+            try:
+                send_json(conn, {"ok": False, "error": str(e)})
+            except OSError:
+                pass
+        finally:
+            conn.close()
+
+
+def serve(helper, socket_path, allowed_uid):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chown(socket_path, allowed_uid, -1)
+    os.chmod(socket_path, 0o600)
+    listener.listen(64)
+    print(f"privhelper: listening on {socket_path} for uid {allowed_uid}", file=sys.stderr)
+    while True:
+        conn, _ = listener.accept()
+        threading.Thread(target=helper.handle, args=(conn, allowed_uid), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default="/run/notebook-service/privhelper.sock", help="Unix socket path")
+    parser.add_argument("--allowed-uid", type=int, required=True, help="uid of the notebook service")
+    parser.add_argument("--home-base", default="/home", help="Directory holding user home directories")
+    parser.add_argument("--python", default="/home/ubuntu/miniconda3/envs/ipy/bin/python",
+                        help="Interpreter notebooks are run with")
+    parser.add_argument("--run-as", default="owner",
+                        help='Account notebooks run as: "owner" (the notebook owner) or a non-root user')
+    parser.add_argument("--min-uid", type=int, default=1000, help="Lowest uid the helper will act for")
+    args = parser.parse_args()
+    if args.run_as != "owner":
+        try:
+            if pwd.getpwnam(args.run_as).pw_uid == 0:
+                parser.error("--run-as must not be root")
+        except KeyError:
+            parser.error(f"--run-as: no such user {args.run_as}")
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    helper = Helper(args.home_base, args.python, args.run_as, args.min_uid)
+    serve(helper, args.socket, args.allowed_uid)
+
+
+if __name__ == "__main__":
+    main()
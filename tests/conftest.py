@@ -0,0 +1,60 @@
+"""Shared fixtures for the notebook service tests (jupyterhub_service1.py and its helper scripts)."""
+import contextlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jupyterhub_service1 as service  # noqa: E402
+
+
+class FakeEncoding:
+    """Stands in for a tiktoken encoding (whose BPE files need a download): one token per 4 bytes."""
+
+    def encode(self, text, disallowed_special=()):
+        return [0] * -(-len(text.encode("utf-8")) // 4)
+
+
+@pytest.fixture
+def token_counter(monkeypatch):
+    """A fresh module-level TokenCounter backed by FakeEncoding."""
+    monkeypatch.setattr(service.tiktoken, "encoding_for_model", lambda model: FakeEncoding())
+    counter = service.TokenCounter()
+    monkeypatch.setattr(service, "token_counter", counter)
+    return counter
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Socket.IO emits made during the test, as (event, data, room)."""
+    events = []
+    monkeypatch.setattr(service.socketio, "emit", lambda event, data, to=None, **kwargs: events.append((event, data, to)))
+    return events
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    Replaces the connection pool: the rows of every execute_values call are recorded in
+    `database.batches`, and setting `database.error` makes the next calls raise it.
+    """
+
+    class Database:
+        batches = []
+        error = None
+
+    def execute_values(cursor, sql, rows, page_size=None):
+        if Database.error is not None:
+            raise Database.error
+        Database.batches.append(list(rows))
+
+    class Connection:
+        def cursor(self):
+            return contextlib.nullcontext()
+
+    monkeypatch.setattr(service, "get_db_connection", lambda: contextlib.nullcontext(Connection()))
+    monkeypatch.setattr(service.psycopg2.extras, "execute_values", execute_values)
+    Database.batches = []
+    return Database
@@ -0,0 +1,90 @@
+import ast
+
+import pytest
+
+from conftest import service
+
+SOURCE = '''import os
+
+
+class Thing:
+    """Doc."""
+
+    def method(self):
+        text = """first
+second line at column zero
+    indented inside the string
+"""
+        value = 1
+        return text + str(value)
+
+    @property
+    def other(self):
+        # loops are split between their statements too
+        for i in range(3):
+            print(i)
+            print(i * 2)
+        return f"""x
+  {self!r}
+y"""
+
+
+def f():
+    return 1
+'''
+
+BROKEN = "def f(:\n    pass\n\nx = [1,\n\nclass C:\n    y = 2\n"
+
+
+@pytest.fixture
+def formatter():
+    formatter = service.ChunkedFormatter(max_workers=2, retries=0)
+    yield formatter
+    formatter._executor.shutdown()
+
+
+@pytest.mark.parametrize("content", [SOURCE, BROKEN, SOURCE * 20, "x = 1"])
+@pytest.mark.parametrize("max_tokens", [5, 30, 200, 10_000])
+def test_chunks_reassemble_to_the_content(token_counter, content, max_tokens):
+    chunks = service.split_content_into_chunks(content, max_tokens)
+
+    assert "".join(chunks) == content
+
+
+def test_no_chunk_is_a_bare_block_header(token_counter):
+    chunks = service.split_content_into_chunks(SOURCE, 30)
+
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert not chunk.rstrip().endswith(":"), chunk
+
+
+def test_formatting_round_trip_preserves_content(token_counter, formatter):
+    received = []
+
+    def identity(code, must_parse):
+        received.append((code, must_parse))
+        return code
+
+    assert formatter.run(SOURCE, identity, 30) == SOURCE
+    # Chunks from inside a block are sent dedented, with the string's own lines left as they were
+    assert any(code.startswith("def method(self):\n    text = \"\"\"first\nsecond line at column zero\n    indented")
+               for code, _ in received)
+    for code, must_parse in received:
+        if must_parse:
+            ast.parse(code)
+
+
+def test_formatted_chunks_are_reindented_outside_strings(token_counter, formatter):
+    def pad_string(code, must_parse):
+        return code.replace('"""first', '"""first ')
+
+    result = formatter.run(SOURCE, pad_string, 30)
+
+    assert result == SOURCE.replace('"""first', '"""first ')
+    ast.parse(result)
+
+
+def test_unparseable_result_of_a_parseable_chunk_fails(token_counter, formatter):
+    with pytest.raises(service.ChunkFormatError):
+        formatter.run(SOURCE, lambda code, must_parse: "def broken(:\n", 30)
@@ -0,0 +1,97 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import notebook_codeworker
+from conftest import service
+
+
+@pytest.fixture
+def pool():
+    pool = service.CodeWorkerPool(size=1, timeout=30, max_jobs=2)
+    yield pool
+    while True:
+        try:
+            pool._idle.get_nowait().stop()
+        except queue.Empty:
+            break
+
+
+def test_syntax_errors_are_structured():
+    result = notebook_codeworker.handle({"op": "validate", "code": "x = 1\ndef f(:\n    pass\n"})
+
+    assert not result["ok"]
+    assert result["error"]["kind"] == "syntax"
+    assert result["error"]["line"] == 2
+    assert result["error"]["text"] == "def f(:"
+
+
+def test_unknown_operation_and_bad_code_are_request_errors():
+    assert notebook_codeworker.handle({"op": "exec", "code": "x = 1"})["error"]["kind"] == "request"
+    assert notebook_codeworker.handle({"op": "validate", "code": None})["error"]["kind"] == "request"
+
+
+def test_worker_results_match_in_process_results(pool):
+    for job in ({"op": "validate", "code": "x = (1,\n"}, {"op": "format", "code": "x  =  [1,2]\n"}):
+        assert pool.run(job["op"], job["code"]) == notebook_codeworker.handle(job)
+    assert pool.run("format", "x  =  [1,2]\n") == {"ok": True, "code": "x = [1, 2]\n"}
+    stats = pool.stats()
+    assert stats["in_process"] == 0
+    assert stats["worker_starts"] == 1
+
+
+def test_results_are_memoized_and_workers_recycled(pool):
+    for code in ("a = 1\n", "b = 2\n", "a = 1\n", "c = 3\n"):
+        assert pool.run("validate", code) == {"ok": True}
+
+    stats = pool.stats()
+    assert stats["jobs"] == 3  # The repeat came from the cache
+    assert stats["recycled"] == 1
+    assert stats["worker_starts"] == 2
+
+
+def test_jobs_over_64_kb_reach_the_worker_under_gevent():
+    # The service monkey-patches gevent at startup, where pipe writes stop at 64 KB; the test
+    # process must stay unpatched, so this runs in a child interpreter.
+    script = textwrap.dedent("""
+        import json, sys
+        from gevent import monkey
+        monkey.patch_all()
+        sys.path.insert(0, sys.argv[1])
+        import jupyterhub_service1 as service
+        pool = service.CodeWorkerPool(size=1, timeout=20)
+        code = "".join(f"value_{i} = {i}\\n" for i in range(10000))
+        print(json.dumps([len(code), pool.run("validate", code), pool.run("validate", code + "def f(:\\n")]))
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script, root], capture_output=True, text=True, timeout=60)
+    size, valid, invalid = json.loads(output.stdout.splitlines()[-1])
+
+    assert size > 64 * 1024
+    assert valid == {"ok": True}
+    assert invalid["error"]["line"] == 10001
+
+
+def test_worker_failures_keep_the_old_contract(monkeypatch):
+    def timeout(*args, **kwargs):
+        raise service.CodeWorkerTimeout("no code worker became free within 30s")
+
+    monkeypatch.setattr(service.code_worker_pool, "run", timeout)
+
+    assert service.validate_python_code("x = 1\n") is False
+    with pytest.raises(ValueError):
+        service.format_python_code("x = 1\n")
+    with pytest.raises(ValueError):
+        service.CodeNormalizer(("black",))("x = 1\n")
+
+
+def test_jobs_run_in_process_without_workers():
+    pool = service.CodeWorkerPool(size=0)
+
+    assert pool.run("format", "x=1\n", line_length=40) == {"ok": True, "code": "x = 1\n"}
+    assert pool.stats()["in_process"] == 1
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return service.FormatCache(str(tmp_path), max_bytes=1 << 20)
+
+
+def key(cache, content, backend="openai"):
+    return cache.key(content, "gpt-4o", 0.3, backend)
+
+
+def test_key_ignores_formatting_noise_but_not_the_backend(cache):
+    assert key(cache, "x = 1\r\n\r\n") == key(cache, "x = 1   \n")
+    assert key(cache, "x = 1\n") != key(cache, "x = 2\n")
+    assert key(cache, "x = 1\n", "stub") != key(cache, "x = 1\n", "openai")
+
+
+def test_miss_then_hit_survives_a_restart(cache, tmp_path):
+    calls = []
+    k = key(cache, "x=1")
+
+    assert cache.get_or_compute(k, lambda: calls.append(1) or "x = 1\n") == "x = 1\n"
+    assert cache.get_or_compute(k, lambda: calls.append(1) or "other") == "x = 1\n"
+    assert len(calls) == 1
+    assert (cache.stats()["misses"], cache.stats()["hits"]) == (1, 1)
+
+    reopened = service.FormatCache(str(tmp_path), max_bytes=1 << 20)
+    assert reopened.get(k) == "x = 1\n"
+    assert reopened.stats()["entries"] == 1
+
+
+def test_concurrent_requests_for_one_key_compute_once(cache):
+    calls = []
+    results = []
+    k = key(cache, "slow = True")
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "slow = True\n"
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(k, compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["slow = True\n"] * 8
+    assert cache.stats()["waits"] >= 1
+
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path):
+    cache = service.FormatCache(str(tmp_path), max_bytes=600)
+    keys = [key(cache, f"value_{i} = {i}") for i in range(3)]
+    for k in keys[:2]:
+        cache.put(k, "x" * 200)
+    assert cache.get(keys[0]) is not None  # Now the most recently used
+
+    cache.put(keys[2], "x" * 200)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(keys[1]) is None
+    assert not os.path.exists(cache._path(keys[1]))
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats()["bytes"] <= 600
+
+
+def test_failures_are_not_cached(cache):
+    k = key(cache, "broken")
+
+    def fail():
+        raise RuntimeError("backend unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(k, fail)
+
+    assert cache.get(k) is None
+    assert not os.path.exists(cache._path(k))
+    assert cache.stats()["inflight"] == 0
+    assert cache.get_or_compute(k, lambda: "fixed\n") == "fixed\n"
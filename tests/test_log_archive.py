@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import service
+
+LINES = [f"line {i} " + "é" * (i % 7) + "x" * (i % 50) for i in range(2000)]
+DATA = "".join(line + "\n" for line in LINES).encode("utf-8")
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    """A finished run archived in small blocks (one per 20 lines), as live flushes leave it."""
+    run_dir = str(tmp_path / "0000000000000001")
+    writer = service.LogArchiveWriter(run_dir, block_bytes=1 << 20, segment_bytes=4096)
+    for start in range(0, len(LINES), 20):
+        writer.append("\n".join(LINES[start:start + 20]))
+        writer.flush()
+    writer.close({"returncode": 0})
+    return run_dir
+
+
+def read_all(run_dir):
+    with service.LogArchiveReader(run_dir) as reader:
+        return {
+            "totals": reader.totals(),
+            "tail": reader.tail(25),
+            "tail_all": reader.tail(len(LINES) + 10),
+            "from_line": reader.from_line(995, 30),
+            "from_end": reader.from_line(len(LINES) - 3, 10),
+            "bytes": reader.byte_range(12345, 6789),
+            "bytes_end": reader.byte_range(len(DATA) - 10, 100),
+        }
+
+
+def expected():
+    return {
+        "totals": {"total_lines": len(LINES), "total_bytes": len(DATA)},
+        "tail": LINES[-25:],
+        "tail_all": LINES,
+        "from_line": LINES[995:1025],
+        "from_end": LINES[-3:],
+        "bytes": DATA[12345:12345 + 6789],
+        "bytes_end": DATA[-10:],
+    }
+
+
+def test_reads_before_compaction(run_dir):
+    with service.LogArchiveReader(run_dir) as reader:
+        assert reader.blocks == 100
+    assert read_all(run_dir) == expected()
+
+
+def test_reads_after_compaction(run_dir):
+    assert service.compact_archived_run(run_dir, block_bytes=16 * 1024)
+
+    with service.LogArchiveReader(run_dir) as reader:
+        assert reader.blocks < 10
+    assert read_all(run_dir) == expected()
+    meta = service._read_archive_meta(run_dir)
+    assert meta["compacted"] and meta["returncode"] == 0
+    assert not service.compact_archived_run(run_dir, block_bytes=16 * 1024)  # Already compacted
+
+
+def test_unfinished_run_is_not_compacted(tmp_path):
+    run_dir = str(tmp_path / "0000000000000002")
+    writer = service.LogArchiveWriter(run_dir, block_bytes=1 << 20)
+    for line in LINES[:100]:
+        writer.append(line)
+        writer.flush()
+
+    assert not service.compact_archived_run(run_dir, block_bytes=16 * 1024)
+    with service.LogArchiveReader(run_dir) as reader:
+        assert reader.tail(3) == LINES[97:100]
@@ -0,0 +1,32 @@
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture
+def paths(monkeypatch):
+    calls = []
+    monkeypatch.setattr(service, "FORKSERVER_ENABLED", True)
+    monkeypatch.setattr(service.privileged_helper, "spawn", lambda username, name: calls.append("helper") or "helper")
+
+    class Pool:
+        def spawn(self, script_path):
+            calls.append("warm")
+            return "warm"
+
+    monkeypatch.setattr(service, "get_interpreter_pool", lambda *args: Pool())
+    return calls
+
+
+def test_helper_runs_notebooks_as_their_owner_before_any_warm_interpreter(paths, monkeypatch):
+    monkeypatch.setattr(service.privileged_helper, "available", lambda: True)
+
+    assert service.spawn_notebook_process("/home/alice/notebooks/bot.py", "alice", "bot.py") == "helper"
+    assert paths == ["helper"]
+
+
+def test_warm_interpreters_serve_runs_only_without_the_helper(paths, monkeypatch):
+    monkeypatch.setattr(service.privileged_helper, "available", lambda: False)
+
+    assert service.spawn_notebook_process("/home/alice/notebooks/bot.py", "alice", "bot.py") == "warm"
+    assert paths == ["warm"]
@@ -0,0 +1,32 @@
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    store = service.NotebookStore(str(tmp_path), 10)
+    monkeypatch.setattr(service, "notebook_store", store)
+    return service.app.test_client()
+
+
+@pytest.mark.parametrize("name", ["../otheruser/strategy", "../../etc/passwd", ".hidden", "a/b"])
+def test_version_history_rejects_names_outside_the_users_refs(client, name):
+    response = client.get("/apa/notebook-versions", query_string={"username": "alice", "notebook_name": name})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Invalid notebook name")
+
+
+@pytest.mark.parametrize("name", ["../otheruser/strategy", "../../etc/passwd"])
+def test_rollback_rejects_names_outside_the_users_refs(client, name):
+    response = client.post("/apa/rollback-notebook", json={"username": "alice", "notebook_name": name, "hash": "0" * 64})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("Invalid notebook name")
+
+
+def test_version_history_of_an_unsaved_notebook_is_not_found(client):
+    response = client.get("/apa/notebook-versions", query_string={"username": "alice", "notebook_name": "bot.py"})
+
+    assert response.status_code == 404
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture(autouse=True)
+def run_record_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "RUN_RECORD_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def process():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+def test_recorded_process_is_recognised(process):
+    service.record_run("alice", "bot.py", process.pid)
+
+    assert service.recorded_run_alive("alice", "bot.py", process.pid)
+    assert not service.recorded_run_alive("alice", "other.py", process.pid)
+
+
+def test_a_reused_pid_is_not_the_run(process, monkeypatch):
+    service.record_run("alice", "bot.py", process.pid)
+    # Same PID, different start time: what a process that reused the PID looks like
+    start_time = service._process_start_time(process.pid)
+    monkeypatch.setattr(service, "_process_start_time", lambda pid: start_time + 1)
+
+    assert not service.recorded_run_alive("alice", "bot.py", process.pid)
+
+
+def test_exited_or_unrecorded_runs_are_not_alive(process):
+    assert not service.recorded_run_alive("alice", "bot.py", process.pid)  # Never recorded
+
+    service.record_run("alice", "bot.py", process.pid)
+    process.kill()
+    process.wait()
+    assert not service.recorded_run_alive("alice", "bot.py", process.pid)
+
+    service.forget_run("alice", "bot.py")
+    service.forget_run("alice", "bot.py")  # Forgetting twice is fine
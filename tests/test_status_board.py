@@ -0,0 +1,129 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture
+def board(emitted):
+    return service.StatusBoard(log_size=4, epoch="epoch-1")
+
+
+def apply(client, delta):
+    """What the client does with a status_delta: apply it when it continues its version."""
+    assert delta["base_version"] == client["version"]
+    for change in delta["changes"]:
+        if change["status"] == "deleted":
+            client["notebooks"].pop(change["notebook_name"], None)
+        else:
+            client["notebooks"][change["notebook_name"]] = change
+    client["version"] = delta["version"]
+
+
+def from_snapshot(snapshot):
+    return {"version": snapshot["version"], "notebooks": {n["notebook_name"]: n for n in snapshot["notebooks"]}}
+
+
+def test_changes_emit_versioned_deltas(board, emitted):
+    board.set_status("alice", "a.py", "running")
+    assert board.set_status("alice", "a.py", "running") is None  # No change, no delta
+    board.set_status("alice", "a.py", "completed")
+
+    deltas = [data for event, data, room in emitted if event == "status_delta"]
+    assert [(d["base_version"], d["version"]) for d in deltas] == [(0, 1), (1, 2)]
+    assert deltas[-1]["changes"] == [{"notebook_name": "a.py", "status": "completed"}]
+
+
+def test_resync_within_the_log_returns_the_missing_changes(board):
+    board.set_status("alice", "a.py", "running")
+    client = from_snapshot(board.snapshot("alice"))
+    board.set_status("alice", "a.py", "completed")
+    board.set_status("alice", "b.py", "running")
+    board.set_status("alice", "b.py", "failed", error="boom")
+
+    event, delta = board.resync("alice", "epoch-1", client["version"])
+
+    assert event == "status_delta"
+    assert (delta["base_version"], delta["version"]) == (1, 4)
+    assert sorted(delta["changes"], key=lambda c: c["notebook_name"]) == [
+        {"notebook_name": "a.py", "status": "completed"},
+        {"notebook_name": "b.py", "status": "failed", "error": "boom"},
+    ]
+    apply(client, delta)
+    assert client == from_snapshot(board.snapshot("alice"))
+
+
+def test_resync_at_current_version_is_an_empty_delta(board):
+    board.set_status("alice", "a.py", "running")
+
+    assert board.resync("alice", "epoch-1", 1) == (
+        "status_delta", {"epoch": "epoch-1", "version": 1, "base_version": 1, "changes": []},
+    )
+
+
+def test_resync_past_the_retained_log_falls_back_to_a_snapshot(board):
+    board.set_status("alice", "a.py", "running")
+    client = from_snapshot(board.snapshot("alice"))
+    for i in range(5):  # One more change than the log keeps
+        board.set_status("alice", f"n{i}.py", "running")
+    board.set_status("alice", "a.py", "deleted")
+
+    event, snapshot = board.resync("alice", "epoch-1", client["version"])
+
+    assert event == "status_snapshot"
+    assert snapshot["version"] == 7
+    assert "a.py" not in from_snapshot(snapshot)["notebooks"]
+    assert board.stats()["resync_snapshots"] == 1
+
+
+@pytest.mark.parametrize("epoch, version", [("epoch-0", 1), ("epoch-1", 9), ("epoch-1", -1), ("epoch-1", None)])
+def test_resync_from_another_epoch_or_an_unknown_version_is_a_snapshot(board, epoch, version):
+    board.set_status("alice", "a.py", "running")
+
+    event, snapshot = board.resync("alice", epoch, version)
+
+    assert event == "status_snapshot"
+    assert snapshot == board.snapshot("alice")
+
+
+def test_seeded_state_does_not_override_live_transitions(board):
+    board.set_status("alice", "a.py", "running")
+    board.load("alice", {
+        "a.py": {"notebook_name": "a.py", "status": "completed"},
+        "b.py": {"notebook_name": "b.py", "status": "stopped"},
+    })
+
+    notebooks = from_snapshot(board.snapshot("alice"))["notebooks"]
+    assert notebooks["a.py"]["status"] == "running"
+    assert notebooks["b.py"]["status"] == "stopped"
+    assert board.is_loaded("alice")
+
+
+def test_load_status_board_keys_by_published_name_and_drops_stale_live_rows(board, monkeypatch, tmp_path):
+    monkeypatch.setattr(service, "status_board", board)
+    monkeypatch.setattr(service, "RUN_RECORD_DIR", str(tmp_path))
+    survivor = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    service.record_run("alice", "live.py", survivor.pid)  # Started before a service restart, still running
+    monkeypatch.setattr(service.notebook_index, "listing", lambda username: {"bot.py": {}, "new.py": {}})
+    monkeypatch.setattr(service, "get_notebook_statuses", lambda username: [
+        ("bot.py.ipynb", "completed", None),
+        ("old.py.ipynb", "running", None),
+        ("bad.py.ipynb", "failed", "boom"),
+        ("live.py.ipynb", "running", None),
+    ])
+
+    try:
+        service.load_status_board("alice")
+    finally:
+        survivor.kill()
+        survivor.wait()
+
+    assert from_snapshot(board.snapshot("alice"))["notebooks"] == {
+        "bot.py": {"notebook_name": "bot.py", "status": "completed"},
+        "new.py": {"notebook_name": "new.py", "status": "stopped"},
+        "old.py": {"notebook_name": "old.py", "status": "stopped"},
+        "bad.py": {"notebook_name": "bad.py", "status": "failed", "error": "boom"},
+        "live.py": {"notebook_name": "live.py", "status": "running"},
+    }
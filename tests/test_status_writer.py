@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import service
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = service.StatusWriter(interval=60)
+    monkeypatch.setattr(writer, "start", lambda: None)  # Flushes only when the test asks
+    return writer
+
+
+def test_transitions_of_one_notebook_are_coalesced(writer, database):
+    writer.submit(1, "a.ipynb", "initializing")
+    writer.submit(1, "b.ipynb", "queued")
+    writer.submit(1, "a.ipynb", "running", process_id=42)
+
+    assert database.batches == []
+    assert writer.flush()["success"]
+    assert database.batches == [[(1, "b.ipynb", "queued", None, None), (1, "a.ipynb", "running", None, 42)]]
+    stats = writer.stats()
+    assert (stats["submitted"], stats["coalesced"], stats["rows_written"], stats["pending"]) == (3, 1, 2, 0)
+
+
+def test_terminal_status_is_written_before_submit_returns(writer, database):
+    writer.submit(1, "a.ipynb", "running")
+    result = writer.submit(1, "a.ipynb", "completed")
+
+    assert result["success"]
+    assert database.batches == [[(1, "a.ipynb", "completed", None, None)]]
+
+
+def test_failed_flush_requeues_rows_unless_superseded(writer, database):
+    writer.submit(1, "a.ipynb", "running")
+    writer.submit(1, "b.ipynb", "running")
+    database.error = RuntimeError("connection refused")
+
+    result = writer.flush()
+
+    assert not result["success"]
+    assert writer.stats()["failures"] == 1
+    assert writer.stats()["pending"] == 2
+
+    writer.submit(1, "a.ipynb", "queued")  # Newer than the row that failed to land
+    database.error = None
+    assert writer.flush()["success"]
+    assert sorted(database.batches[0]) == [(1, "a.ipynb", "queued", None, None), (1, "b.ipynb", "running", None, None)]
+    assert writer.stats()["pending"] == 0
+
+
+def test_failed_terminal_write_is_reported(writer, database):
+    database.error = RuntimeError("connection refused")
+
+    result = writer.submit(1, "a.ipynb", "failed", error_message="boom")
+
+    assert not result["success"]
+    assert "connection refused" in result["message"]
+    assert writer.stats()["pending"] == 1
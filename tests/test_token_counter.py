@@ -0,0 +1,30 @@
+from conftest import service
+
+
+def test_only_the_byte_bound_answers_fits_without_counting(token_counter):
+    assert token_counter.check_budget("x" * 100, "gpt-4o", 100) == (True, 100, False)
+
+    # Dense content (here 4 bytes per token) between the byte bound and the "over" estimate is counted
+    fits, tokens, exact = token_counter.check_budget("x" * 300, "gpt-4o", 100)
+    assert (fits, tokens, exact) == (True, 75, True)
+    fits, tokens, exact = token_counter.check_budget("é" * 300, "gpt-4o", 100)  # 600 bytes, 150 tokens
+    assert (fits, tokens, exact) == (False, 150, True)
+
+
+def test_clearly_oversized_content_is_over_without_counting(token_counter):
+    fits, tokens, exact = token_counter.check_budget("x" * 1000, "gpt-4o", 100)
+
+    assert (fits, exact) == (False, False)
+    assert tokens > 100
+    stats = token_counter.stats()
+    assert stats["over_estimate"] == 1
+    assert stats["exact_counts"] == 0
+
+
+def test_exact_counts_are_memoized(token_counter):
+    for _ in range(3):
+        token_counter.check_budget("y" * 500, "gpt-4o", 200)
+
+    stats = token_counter.stats()
+    assert stats["exact_counts"] == 1
+    assert stats["cache_hits"] == 2